@@ -1,7 +1,11 @@
 """Streamlit web UI for YouTube Competitor Analysis."""
 
+import hashlib
+import hmac
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
 
 import streamlit as st
@@ -25,28 +29,60 @@ st.title("YouTube Competitor Analysis")
 st.caption("Generate a Google Slides report comparing your channel against competitors.")
 
 
+# --- Pipeline runner ---
+_DONE = object()
+
+
+def _drain(events: queue.Queue, stop: threading.Event, **kwargs) -> None:
+    """Run the pipeline in a worker thread, forwarding its events to a queue.
+
+    Keeps the API calls running at network speed while the script thread
+    renders progress. Once `stop` is set (the script thread was rerun or
+    stopped), the pipeline is closed at its next event instead of spending
+    quota on a report nobody will see. Always ends with the _DONE sentinel.
+    """
+    pipeline = run_pipeline(**kwargs)
+    try:
+        for event in pipeline:
+            if stop.is_set():
+                break
+            events.put(event)
+    except Exception as e:
+        events.put({"type": "error", "message": f"Pipeline failed: {e}"})
+    finally:
+        pipeline.close()
+        events.put(_DONE)
+
+
 # --- Password gate ---
-def check_password() -> bool:
-    """Simple password check using APP_PASSWORD secret."""
+def _password_digest() -> bytes | None:
+    """SHA-256 of APP_PASSWORD, resolved on every check.
+
+    Not cached, so a secret set or rotated after startup takes effect without
+    restarting the server; one hash per page load costs nothing.
+    """
     app_password = os.getenv("APP_PASSWORD")
     if not app_password:
         try:
             app_password = st.secrets.get("APP_PASSWORD", "")
         except FileNotFoundError:
             app_password = ""
-    if not app_password:
-        st.error("APP_PASSWORD not configured. Set it in .env or Streamlit secrets.")
-        return False
+    return hashlib.sha256(app_password.encode()).digest() if app_password else None
 
-    if "authenticated" not in st.session_state:
-        st.session_state.authenticated = False
 
-    if st.session_state.authenticated:
+def check_password() -> bool:
+    """Simple password check using APP_PASSWORD secret."""
+    if st.session_state.get("authenticated"):
         return True
 
+    expected = _password_digest()
+    if expected is None:
+        st.error("APP_PASSWORD not configured. Set it in .env or Streamlit secrets.")
+        return False
+
     password = st.text_input("Password", type="password", placeholder="Enter password")
     if st.button("Login"):
-        if password == app_password:
+        if hmac.compare_digest(hashlib.sha256(password.encode()).digest(), expected):
             st.session_state.authenticated = True
             st.rerun()
         else:
@@ -103,22 +139,37 @@ if st.button("Generate Report", type="primary", use_container_width=True):
         report_url = None
         error_occurred = False
 
-        for event in run_pipeline(
-            channel=channel.strip(),
-            competitors=competitors,
-            days=days,
-            server_mode=True,
-        ):
-            if event["type"] == "progress":
-                st.write(event["message"])
-            elif event["type"] == "error":
-                status.update(label="Error", state="error")
-                st.error(event["message"])
-                error_occurred = True
-                break
-            elif event["type"] == "result":
-                report_url = event.get("report_url")
-                summary = event.get("summary", {})
+        events = queue.Queue()
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=_drain,
+            args=(events, stop),
+            kwargs={
+                "channel": channel.strip(),
+                "competitors": competitors,
+                "days": days,
+                "server_mode": True,
+            },
+            daemon=True,
+        )
+        worker.start()
+
+        # A rerun or stop raises out of this loop; the finally tells the
+        # worker to close the pipeline rather than finish it unseen
+        try:
+            while (event := events.get()) is not _DONE:
+                if event["type"] == "progress":
+                    st.write(event["message"])
+                elif event["type"] == "error":
+                    status.update(label="Error", state="error")
+                    st.error(event["message"])
+                    error_occurred = True
+                    break
+                elif event["type"] == "result":
+                    report_url = event.get("report_url")
+                    summary = event.get("summary", {})
+        finally:
+            stop.set()
 
         if not error_occurred:
             status.update(label="Complete!", state="complete")
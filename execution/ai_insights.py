@@ -12,17 +12,30 @@ Usage:
     python execution/ai_insights.py
 """
 
+import functools
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import anthropic
+import orjson
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+from anthropic.types.messages.batch_create_params import Request
 from dotenv import load_dotenv
 
 
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
 MODEL = "claude-sonnet-4-5-20250929"
 MAX_TOKENS = 4096
 
+# Message Batches: poll interval and how long to wait, across both batches of a
+# run, before giving up
+BATCH_POLL_SECONDS = 5
+BATCH_TIMEOUT_SECONDS = 30 * 60
+
 SYSTEM_PROMPT = (
     "You are an expert YouTube strategist analyzing competitive channel data. "
     "You provide specific, data-backed insights — never generic advice. "
@@ -36,6 +49,35 @@ SYSTEM_PROMPT = (
 # Context builder
 # ---------------------------------------------------------------------------
 
+# Per-channel metric lines and top-video line, filled via str.format_map
+# straight from the analytics summary dicts
+_CHANNEL_TMPL = (
+    "Subscribers: {subscriber_count:,}\n"
+    "Period Views: {total_period_views:,}\n"
+    "Videos Published: {video_count}\n"
+    "Avg Engagement: {avg_engagement:.2f}%\n"
+    "Upload Frequency: {upload_frequency:.1f}/week\n"
+    "Top Videos:"
+)
+_TOP_VIDEO_TMPL = (
+    '  - "{title}" — {views:,} views, '
+    "{engagement:.1f}% eng, {outlier_score:.2f}x outlier"
+)
+_LEADERBOARD_TMPL = (
+    '  - "{title}" by {channel_name} — '
+    "{views:,} views, {outlier_score:.2f}x outlier, "
+    "{engagement:.1f}% eng"
+)
+
+
+def _format_channel_block(summary: dict) -> str:
+    """Format one channel's metrics and top 5 videos (no header line)."""
+    return "\n".join([
+        _CHANNEL_TMPL.format_map(summary),
+        *(_TOP_VIDEO_TMPL.format_map(v) for v in summary["top_videos"][:5]),
+    ])
+
+
 def _build_context(analytics: dict) -> str:
     """Build a concise text summary of analytics data for Claude prompts."""
     channel = analytics["channel"]
@@ -47,32 +89,12 @@ def _build_context(analytics: dict) -> str:
     # Your channel
     lines.append("=== YOUR CHANNEL ===")
     lines.append(f"Name: {channel['channel_name']}")
-    lines.append(f"Subscribers: {channel['subscriber_count']:,}")
-    lines.append(f"Period Views: {channel['total_period_views']:,}")
-    lines.append(f"Videos Published: {channel['video_count']}")
-    lines.append(f"Avg Engagement: {channel['avg_engagement']:.2f}%")
-    lines.append(f"Upload Frequency: {channel['upload_frequency']:.1f}/week")
-    lines.append("Top Videos:")
-    for v in channel["top_videos"][:5]:
-        lines.append(
-            f"  - \"{v['title']}\" — {v['views']:,} views, "
-            f"{v['engagement']:.1f}% eng, {v['outlier_score']:.2f}x outlier"
-        )
+    lines.append(_format_channel_block(channel))
 
     # Competitors
     for comp in competitors:
         lines.append(f"\n=== COMPETITOR: {comp['channel_name']} ===")
-        lines.append(f"Subscribers: {comp['subscriber_count']:,}")
-        lines.append(f"Period Views: {comp['total_period_views']:,}")
-        lines.append(f"Videos Published: {comp['video_count']}")
-        lines.append(f"Avg Engagement: {comp['avg_engagement']:.2f}%")
-        lines.append(f"Upload Frequency: {comp['upload_frequency']:.1f}/week")
-        lines.append("Top Videos:")
-        for v in comp["top_videos"][:5]:
-            lines.append(
-                f"  - \"{v['title']}\" — {v['views']:,} views, "
-                f"{v['engagement']:.1f}% eng, {v['outlier_score']:.2f}x outlier"
-            )
+        lines.append(_format_channel_block(comp))
 
     # Comparative rankings
     lines.append("\n=== COMPARATIVE RANKINGS ===")
@@ -86,30 +108,34 @@ def _build_context(analytics: dict) -> str:
 
     # Cross-channel leaderboard
     lines.append("\nCross-Channel Outlier Leaderboard:")
-    for v in comparative["cross_channel_leaderboard"][:10]:
-        lines.append(
-            f"  - \"{v['title']}\" by {v['channel_name']} — "
-            f"{v['views']:,} views, {v['outlier_score']:.2f}x outlier, "
-            f"{v['engagement']:.1f}% eng"
-        )
+    lines.extend(
+        _LEADERBOARD_TMPL.format_map(v)
+        for v in comparative["cross_channel_leaderboard"][:10]
+    )
 
     return "\n".join(lines)
 
 
+def _user_content(context: str, task: str) -> list[dict]:
+    """Build user-turn content blocks: shared analytics context, then the task.
+
+    All three calls send the same system prompt followed by the same context
+    block, marked for prompt caching — the first call writes the cache and the
+    next two read it at 10% of the input token price.
+    """
+    return [
+        {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": task},
+    ]
+
+
 # ---------------------------------------------------------------------------
 # Individual insight generators
 # ---------------------------------------------------------------------------
 
-def generate_comparative_analysis(analytics: dict, client: anthropic.Anthropic) -> dict:
-    """Generate comparative analysis narrative via Claude API.
-
-    Returns:
-        {overview, key_trends, content_gaps, top_performer_note}
-    """
-    context = _build_context(analytics)
-    channel_name = analytics["channel"]["channel_name"]
-
-    response = client.messages.create(
+def _comparative_request(context: str, channel_name: str) -> MessageCreateParamsNonStreaming:
+    """Build the Messages API params for the comparative analysis."""
+    return MessageCreateParamsNonStreaming(
         model=MODEL,
         max_tokens=MAX_TOKENS,
         temperature=0.3,
@@ -117,9 +143,8 @@ def generate_comparative_analysis(analytics: dict, client: anthropic.Anthropic)
         messages=[
             {
                 "role": "user",
-                "content": (
+                "content": _user_content(context, (
                     f"Analyze this YouTube competitive landscape data for {channel_name}.\n\n"
-                    f"{context}\n\n"
                     "Return a JSON object with exactly this structure:\n"
                     "{\n"
                     '  "overview": "2-3 sentence summary of the competitive landscape, '
@@ -140,7 +165,7 @@ def generate_comparative_analysis(analytics: dict, client: anthropic.Anthropic)
                     'max 80 characters"\n'
                     "}\n\n"
                     "Return ONLY valid JSON, no other text."
-                ),
+                )),
             },
             {
                 "role": "assistant",
@@ -149,38 +174,91 @@ def generate_comparative_analysis(analytics: dict, client: anthropic.Anthropic)
         ],
     )
 
-    raw = "{" + response.content[0].text
-    return json.loads(raw)
+
+def _expect(value, expected: type, what: str):
+    """Return value if it is an instance of expected, else raise ValueError."""
+    if not isinstance(value, expected):
+        raise ValueError(
+            f"Claude returned {what} as {type(value).__name__}, "
+            f"expected {expected.__name__}"
+        )
+    return value
+
+
+def _expect_str_list(value, what: str) -> list[str]:
+    """Return value if it is a list of strings, else raise ValueError."""
+    for item in _expect(value, list, what):
+        _expect(item, str, f"an item of {what}")
+    return value
+
+
+def _parse_comparative(text: str) -> dict:
+    """Parse and shape-check the comparative analysis response (prefilled with '{').
+
+    Fields may be missing (the report falls back per field), but any field
+    present must have the right type.
+    """
+    comparative = _expect(orjson.loads("{" + text), dict, "the comparative analysis")
+    for key in ("overview", "top_performer_note"):
+        if key in comparative:
+            _expect(comparative[key], str, key)
+    for key in ("key_trends", "content_gaps"):
+        if key in comparative:
+            _expect_str_list(comparative[key], key)
+    return comparative
+
+
+def generate_comparative_analysis(context: str, channel_name: str,
+                                  client: anthropic.Anthropic) -> dict:
+    """Generate comparative analysis narrative via Claude API.
+
+    Args:
+        context: Analytics summary from _build_context()
+        channel_name: The primary channel's name
+
+    Returns:
+        {overview, key_trends, content_gaps, top_performer_note}
+    """
+    request = _comparative_request(context, channel_name)
+    return _parse_comparative(_create_message(client, request))
+
+
+def _comparative_summary(comparative: dict) -> str:
+    """Render the comparative result as the summary block both follow-up prompts embed.
+
+    Built once per run so the ideas and takeaways prompts carry identical bytes.
+    """
+    return (
+        "Comparative Analysis Summary:\n"
+        f"- Overview: {comparative.get('overview', 'N/A')}\n"
+        f"- Key Trends: {json.dumps(comparative.get('key_trends', []))}\n"
+        f"- Content Gaps: {json.dumps(comparative.get('content_gaps', []))}\n\n"
+    )
 
 
 def _load_hooks_sop() -> str:
     """Load the hooks SOP from directives/sops/hooks.md if it exists."""
-    sop_path = Path(__file__).resolve().parent.parent / "directives" / "sops" / "hooks.md"
+    sop_path = _PROJECT_ROOT / "directives" / "sops" / "hooks.md"
     if sop_path.exists():
         return sop_path.read_text(encoding="utf-8")
     return ""
 
 
-def generate_video_ideas(analytics: dict, comparative: dict,
-                         client: anthropic.Anthropic) -> list[dict]:
-    """Generate 5 video ideas based on analytics and comparative analysis.
-
-    Returns:
-        List of 5 dicts, each with:
-        {title: str, title_variations: [str x5], hooks: [str, str], topic: str}
-    """
-    context = _build_context(analytics)
-    channel_name = analytics["channel"]["channel_name"]
+def _video_ideas_request(context: str, channel_name: str,
+                         summary: str) -> MessageCreateParamsNonStreaming:
+    """Build the Messages API params for the video ideas."""
     hooks_sop = _load_hooks_sop()
 
-    system_msg = (
-        "You are an expert YouTube strategist creating data-backed video ideas. "
+    # Task-specific guidance lives in the user turn (not the system prompt) so
+    # the system + context prefix stays identical across calls for caching
+    guidance = (
+        "You are creating data-backed video ideas. "
         "Each idea should capitalize on proven formats and topics from the competitive "
         "analysis. Ideas must be specific and actionable — not generic. Title variations "
         "should be distinct clickable titles, not minor word swaps."
     )
     if hooks_sop:
-        system_msg += (
+        guidance += (
             "\n\nUse the following Hook SOP to structure each hook. Every hook MUST "
             "follow the 5-part formula: (1) Bold Claim/Surprising Fact, "
             "(2) Credibility Marker with specific numbers, (3) Specific Promise, "
@@ -189,27 +267,24 @@ def generate_video_ideas(analytics: dict, comparative: dict,
             f"=== HOOK SOP ===\n{hooks_sop}\n=== END HOOK SOP ==="
         )
     else:
-        system_msg += (
+        guidance += (
             " Hooks should be written as spoken word — the first 15 seconds of the "
             "video, as if the creator is speaking directly to camera."
         )
 
-    response = client.messages.create(
+    return MessageCreateParamsNonStreaming(
         model=MODEL,
         max_tokens=MAX_TOKENS,
         temperature=0.5,
-        system=system_msg,
+        system=SYSTEM_PROMPT,
         messages=[
             {
                 "role": "user",
-                "content": (
+                "content": _user_content(context, (
+                    f"{guidance}\n\n"
                     f"Based on this competitive analysis for {channel_name}, "
                     "generate 5 video ideas.\n\n"
-                    f"{context}\n\n"
-                    "Comparative Analysis Summary:\n"
-                    f"- Overview: {comparative.get('overview', 'N/A')}\n"
-                    f"- Key Trends: {json.dumps(comparative.get('key_trends', []))}\n"
-                    f"- Content Gaps: {json.dumps(comparative.get('content_gaps', []))}\n\n"
+                    f"{summary}"
                     "Each idea should:\n"
                     "1. Be inspired by specific outlier videos or content gaps in the data\n"
                     f"2. Be adapted for {channel_name}'s style and audience\n"
@@ -234,7 +309,7 @@ def generate_video_ideas(analytics: dict, comparative: dict,
                     "  }\n"
                     "]\n\n"
                     "Return ONLY valid JSON, no other text."
-                ),
+                )),
             },
             {
                 "role": "assistant",
@@ -243,42 +318,55 @@ def generate_video_ideas(analytics: dict, comparative: dict,
         ],
     )
 
-    raw = "[" + response.content[0].text
-    ideas = json.loads(raw)
-    return ideas[:5]
 
+def _parse_video_ideas(text: str) -> list[dict]:
+    """Parse and shape-check the video ideas response (prefilled with '[')."""
+    ideas = _expect(orjson.loads("[" + text), list, "the video ideas")[:5]
+    for idea in ideas:
+        _expect(idea, dict, "a video idea")
+        for key in ("title", "topic"):
+            if key in idea:
+                _expect(idea[key], str, f"idea {key}")
+        for key in ("title_variations", "hooks"):
+            if key in idea:
+                _expect_str_list(idea[key], f"idea {key}")
+    return ideas
 
-def generate_takeaways(analytics: dict, comparative: dict,
-                       client: anthropic.Anthropic) -> list[str]:
-    """Generate 3 strategic takeaways.
+
+def generate_video_ideas(context: str, channel_name: str, summary: str,
+                         client: anthropic.Anthropic) -> list[dict]:
+    """Generate 5 video ideas based on analytics and comparative analysis.
+
+    Args:
+        summary: Comparative analysis block from _comparative_summary()
 
     Returns:
-        List of 3 actionable takeaway strings.
+        List of 5 dicts, each with:
+        {title: str, title_variations: [str x5], hooks: [str, str], topic: str}
     """
-    context = _build_context(analytics)
-    channel_name = analytics["channel"]["channel_name"]
+    request = _video_ideas_request(context, channel_name, summary)
+    return _parse_video_ideas(_create_message(client, request))
 
-    response = client.messages.create(
+
+def _takeaways_request(context: str, channel_name: str,
+                       summary: str) -> MessageCreateParamsNonStreaming:
+    """Build the Messages API params for the strategic takeaways."""
+    return MessageCreateParamsNonStreaming(
         model=MODEL,
         max_tokens=MAX_TOKENS,
         temperature=0.3,
-        system=(
-            "You are an expert YouTube strategist providing actionable recommendations. "
-            "Each takeaway must be specific to the channels analyzed — never generic advice "
-            "like 'post consistently' or 'engage with your audience'. Reference actual "
-            "metrics and competitor performance."
-        ),
+        system=SYSTEM_PROMPT,
         messages=[
             {
                 "role": "user",
-                "content": (
+                "content": _user_content(context, (
+                    "You are providing actionable recommendations. "
+                    "Each takeaway must be specific to the channels analyzed — never generic advice "
+                    "like 'post consistently' or 'engage with your audience'. Reference actual "
+                    "metrics and competitor performance.\n\n"
                     f"Based on this competitive analysis for {channel_name}, "
                     "provide 3 strategic takeaways.\n\n"
-                    f"{context}\n\n"
-                    "Comparative Analysis Summary:\n"
-                    f"- Overview: {comparative.get('overview', 'N/A')}\n"
-                    f"- Key Trends: {json.dumps(comparative.get('key_trends', []))}\n"
-                    f"- Content Gaps: {json.dumps(comparative.get('content_gaps', []))}\n\n"
+                    f"{summary}"
                     "Each takeaway should:\n"
                     f"1. Be specific and actionable for {channel_name}\n"
                     "2. Reference actual competitor data and metrics\n"
@@ -287,7 +375,7 @@ def generate_takeaways(analytics: dict, comparative: dict,
                     "Return a JSON array of exactly 3 strings:\n"
                     '["Takeaway 1...", "Takeaway 2...", "Takeaway 3..."]\n\n'
                     "Return ONLY valid JSON, no other text."
-                ),
+                )),
             },
             {
                 "role": "assistant",
@@ -296,26 +384,104 @@ def generate_takeaways(analytics: dict, comparative: dict,
         ],
     )
 
-    raw = "[" + response.content[0].text
-    takeaways = json.loads(raw)
-    return takeaways[:3]
+
+def _parse_takeaways(text: str) -> list[str]:
+    """Parse and shape-check the takeaways response (prefilled with '[')."""
+    return _expect_str_list(orjson.loads("[" + text)[:3], "the takeaways")
+
+
+def generate_takeaways(context: str, channel_name: str, summary: str,
+                       client: anthropic.Anthropic) -> list[str]:
+    """Generate 3 strategic takeaways.
+
+    Args:
+        summary: Comparative analysis block from _comparative_summary()
+
+    Returns:
+        List of 3 actionable takeaway strings.
+    """
+    request = _takeaways_request(context, channel_name, summary)
+    return _parse_takeaways(_create_message(client, request))
+
+
+# ---------------------------------------------------------------------------
+# Request execution — direct or via the Message Batches API
+# ---------------------------------------------------------------------------
+
+def _create_message(client: anthropic.Anthropic,
+                    params: MessageCreateParamsNonStreaming) -> str:
+    """Send one Messages request and return the text of the response."""
+    response = client.messages.create(**params)
+    return response.content[0].text
+
+
+def _run_batch(client: anthropic.Anthropic,
+               requests: dict[str, MessageCreateParamsNonStreaming],
+               deadline: float) -> dict[str, str]:
+    """Run requests through the Message Batches API (50% token discount).
+
+    Args:
+        requests: Messages API params keyed by custom_id.
+        deadline: time.monotonic() value after which the batch is cancelled.
+
+    Returns:
+        Response text keyed by custom_id.
+
+    Raises:
+        TimeoutError: If the batch hasn't ended by the deadline.
+        RuntimeError: If any request in the batch didn't succeed.
+    """
+    batch = client.messages.batches.create(
+        requests=[
+            Request(custom_id=custom_id, params=params)
+            for custom_id, params in requests.items()
+        ],
+    )
+
+    while batch.processing_status != "ended":
+        if time.monotonic() > deadline:
+            client.messages.batches.cancel(batch.id)
+            raise TimeoutError(
+                f"Message batch {batch.id} did not finish within the "
+                f"{BATCH_TIMEOUT_SECONDS // 60}-minute batch budget"
+            )
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    texts = {}
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type != "succeeded":
+            raise RuntimeError(
+                f"Batch request '{entry.custom_id}' {entry.result.type}"
+            )
+        texts[entry.custom_id] = entry.result.message.content[0].text
+    return texts
 
 
 # ---------------------------------------------------------------------------
 # Top-level entry point
 # ---------------------------------------------------------------------------
 
-def generate_insights(analytics: dict) -> dict:
+@functools.cache
+def _ensure_env() -> None:
+    """Load the project .env once per process (existing env vars win)."""
+    load_dotenv(_PROJECT_ROOT / ".env", override=False)
+
+
+def generate_insights(analytics: dict, use_batch: bool = True) -> dict:
     """Generate all AI insights from analytics data.
 
     Args:
         analytics: Processed analytics dict (from .tmp/analytics.json)
+        use_batch: If True, send the requests through the Message Batches API
+                   (half the token cost, but results can take up to
+                   BATCH_TIMEOUT_SECONDS in total). Pass False for interactive
+                   runs.
 
     Returns:
         Dict with keys: comparative_analysis, video_ideas, takeaways.
     """
-    env_path = Path(__file__).resolve().parent.parent / ".env"
-    load_dotenv(env_path)
+    _ensure_env()
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
@@ -324,16 +490,45 @@ def generate_insights(analytics: dict) -> dict:
             "Add your Anthropic API key to .env to enable AI insights."
         )
 
+    # One client shared by all calls so the HTTP connection pool is reused
     client = anthropic.Anthropic(api_key=api_key)
 
-    print("  Generating comparative analysis...")
-    comparative = generate_comparative_analysis(analytics, client)
-
-    print("  Generating video ideas...")
-    video_ideas = generate_video_ideas(analytics, comparative, client)
+    # Built once and shared by all three prompts (identical bytes for caching)
+    context = _build_context(analytics)
+    channel_name = analytics["channel"]["channel_name"]
 
-    print("  Generating takeaways...")
-    takeaways = generate_takeaways(analytics, comparative, client)
+    if use_batch:
+        # One budget for both batches, so a run waits at most BATCH_TIMEOUT_SECONDS
+        deadline = time.monotonic() + BATCH_TIMEOUT_SECONDS
+
+        print("  Generating comparative analysis (batch)...")
+        texts = _run_batch(client, {"comparative": _comparative_request(context, channel_name)},
+                           deadline)
+        comparative = _parse_comparative(texts["comparative"])
+        summary = _comparative_summary(comparative)
+
+        # Ideas and takeaways only depend on the comparative result — one batch for both
+        print("  Generating video ideas and takeaways (batch)...")
+        texts = _run_batch(client, {
+            "ideas": _video_ideas_request(context, channel_name, summary),
+            "takeaways": _takeaways_request(context, channel_name, summary),
+        }, deadline)
+        video_ideas = _parse_video_ideas(texts["ideas"])
+        takeaways = _parse_takeaways(texts["takeaways"])
+    else:
+        print("  Generating comparative analysis...")
+        comparative = generate_comparative_analysis(context, channel_name, client)
+        summary = _comparative_summary(comparative)
+
+        # Ideas and takeaways only depend on the comparative result — run them concurrently
+        print("  Generating video ideas and takeaways...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ideas_future = executor.submit(
+                generate_video_ideas, context, channel_name, summary, client)
+            takeaways_future = executor.submit(
+                generate_takeaways, context, channel_name, summary, client)
+            video_ideas = ideas_future.result()
+            takeaways = takeaways_future.result()
 
     return {
         "comparative_analysis": comparative,
@@ -347,23 +542,20 @@ def generate_insights(analytics: dict) -> dict:
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    env_path = Path(__file__).resolve().parent.parent / ".env"
-    load_dotenv(env_path)
+    _ensure_env()
 
-    analytics_path = Path(__file__).resolve().parent.parent / ".tmp" / "analytics.json"
+    analytics_path = _PROJECT_ROOT / ".tmp" / "analytics.json"
     if not analytics_path.exists():
         print(f"Error: {analytics_path} not found. Run the pipeline first.")
         raise SystemExit(1)
 
-    with open(analytics_path, "r", encoding="utf-8") as f:
-        analytics = json.load(f)
+    analytics = orjson.loads(analytics_path.read_bytes())
 
     insights = generate_insights(analytics)
 
     # Save to .tmp/insights.json
-    insights_path = Path(__file__).resolve().parent.parent / ".tmp" / "insights.json"
-    with open(insights_path, "w", encoding="utf-8") as f:
-        json.dump(insights, f, indent=2, ensure_ascii=False)
+    insights_path = _PROJECT_ROOT / ".tmp" / "insights.json"
+    insights_path.write_bytes(orjson.dumps(insights, option=orjson.OPT_INDENT_2))
 
     print(f"\n  Insights saved: {insights_path}")
     print(f"  Comparative overview: {insights['comparative_analysis']['overview'][:100]}...")
@@ -4,6 +4,8 @@ Pure computation module. Takes raw data dicts from youtube_api, returns
 analytics dicts. No API calls, no file I/O.
 """
 
+import heapq
+from operator import itemgetter
 from statistics import median
 
 
@@ -32,22 +34,25 @@ def calculate_outlier_scores(
     baseline_views = [v.get("views", 0) for v in baseline_videos]
     median_views = median(baseline_views) if baseline_views else 0
 
-    scored = []
-    for video in period_videos:
-        enriched = dict(video)
-        enriched["engagement"] = calculate_engagement(video)
-        if median_views > 0:
-            enriched["outlier_score"] = round(video.get("views", 0) / median_views, 2)
-        else:
-            enriched["outlier_score"] = 0
-        scored.append(enriched)
-
-    return scored
+    # Branch on the median once, not per video
+    if median_views > 0:
+        return [
+            {
+                **video,
+                "engagement": calculate_engagement(video),
+                "outlier_score": round(video.get("views", 0) / median_views, 2),
+            }
+            for video in period_videos
+        ]
+    return [
+        {**video, "engagement": calculate_engagement(video), "outlier_score": 0}
+        for video in period_videos
+    ]
 
 
 def rank_top_videos(videos: list[dict], n: int = 5) -> list[dict]:
     """Return top N videos by outlier_score descending."""
-    sorted_videos = sorted(videos, key=lambda v: v.get("outlier_score", 0), reverse=True)
+    top = heapq.nlargest(n, videos, key=lambda v: v.get("outlier_score", 0))
     return [
         {
             "title": v["title"],
@@ -56,7 +61,7 @@ def rank_top_videos(videos: list[dict], n: int = 5) -> list[dict]:
             "engagement": round(v.get("engagement", 0), 2),
             "outlier_score": v.get("outlier_score", 0),
         }
-        for v in sorted_videos[:n]
+        for v in top
     ]
 
 
@@ -75,14 +80,18 @@ def build_channel_summary(channel_data: dict, days: int) -> dict:
         channel_data["period_videos"], channel_data["baseline_videos"]
     )
 
-    total_period_views = sum(v.get("views", 0) for v in period_videos)
+    # Single pass over the scored videos for all per-channel totals
+    total_period_views = 0
+    total_engagement = 0
+    total_duration = 0
+    for v in period_videos:
+        total_period_views += v.get("views", 0)
+        total_engagement += v.get("engagement", 0)
+        total_duration += v.get("duration_seconds", 0)
     video_count = len(period_videos)
 
-    engagements = [v.get("engagement", 0) for v in period_videos]
-    avg_engagement = round(sum(engagements) / len(engagements), 2) if engagements else 0.0
-
-    durations = [v.get("duration_seconds", 0) for v in period_videos]
-    avg_duration = round(sum(durations) / len(durations), 1) if durations else 0.0
+    avg_engagement = round(total_engagement / video_count, 2) if video_count else 0.0
+    avg_duration = round(total_duration / video_count, 1) if video_count else 0.0
 
     weeks = max(days / 7, 1)
     upload_frequency = round(video_count / weeks, 2)
@@ -132,39 +141,39 @@ def build_comparative_data(
         for s in by_engagement
     ]
 
-    # Rankings by highest single outlier score
-    def best_outlier(summary):
-        if summary["top_videos"]:
-            return summary["top_videos"][0]["outlier_score"]
-        return 0
-
-    by_outlier = sorted(all_summaries, key=best_outlier, reverse=True)
+    # Rankings by highest single outlier score (top_videos is already sorted,
+    # so the first entry is each channel's best) — computed once per channel
+    best_outliers = [
+        (s["channel_name"], s["top_videos"][0]["outlier_score"] if s["top_videos"] else 0)
+        for s in all_summaries
+    ]
+    best_outliers.sort(key=itemgetter(1), reverse=True)
     outlier_ranking = [
-        {
-            "channel_name": s["channel_name"],
-            "highest_outlier_score": best_outlier(s),
-        }
-        for s in by_outlier
+        {"channel_name": name, "highest_outlier_score": score}
+        for name, score in best_outliers
     ]
 
     # Top performer: highest total period views
     top_performer = by_views[0]["channel_name"] if by_views else None
 
-    # Cross-channel outlier leaderboard: top 10 videos across all channels
-    all_videos = []
-    for s in all_summaries:
-        for v in s.get("period_videos", []):
-            all_videos.append({
-                "channel_name": s["channel_name"],
-                "title": v["title"],
-                "video_id": v["video_id"],
-                "views": v["views"],
-                "outlier_score": v.get("outlier_score", 0),
-                "engagement": round(v.get("engagement", 0), 2),
-            })
-
-    all_videos.sort(key=lambda v: v["outlier_score"], reverse=True)
-    cross_channel_leaderboard = all_videos[:10]
+    # Cross-channel outlier leaderboard: top 10 videos across all channels.
+    # Stream (score, channel, video) tuples and only build dicts for the winners.
+    candidates = (
+        (v.get("outlier_score", 0), s["channel_name"], v)
+        for s in all_summaries
+        for v in s.get("period_videos", [])
+    )
+    cross_channel_leaderboard = [
+        {
+            "channel_name": channel_name,
+            "title": v["title"],
+            "video_id": v["video_id"],
+            "views": v["views"],
+            "outlier_score": score,
+            "engagement": round(v.get("engagement", 0), 2),
+        }
+        for score, channel_name, v in heapq.nlargest(10, candidates, key=itemgetter(0))
+    ]
 
     return {
         "views_ranking": views_ranking,
@@ -175,6 +184,27 @@ def build_comparative_data(
     }
 
 
+def assemble_analytics(
+    channel_summary: dict, competitor_summaries: list[dict]
+) -> dict:
+    """Combine per-channel summaries into the full analytics dict.
+
+    Lets callers build each summary as its channel's data arrives and only
+    run the cross-channel step once all are in.
+
+    Returns:
+        Analytics dict with channel summary, competitor summaries, and
+        comparative data.
+    """
+    comparative = build_comparative_data(channel_summary, competitor_summaries)
+
+    return {
+        "channel": channel_summary,
+        "competitors": competitor_summaries,
+        "comparative": comparative,
+    }
+
+
 def process_all(raw_data: dict) -> dict:
     """Process raw_data into complete analytics.
 
@@ -193,10 +223,4 @@ def process_all(raw_data: dict) -> dict:
         build_channel_summary(comp, days) for comp in raw_data["competitors"]
     ]
 
-    comparative = build_comparative_data(channel_summary, competitor_summaries)
-
-    return {
-        "channel": channel_summary,
-        "competitors": competitor_summaries,
-        "comparative": comparative,
-    }
+    return assemble_analytics(channel_summary, competitor_summaries)
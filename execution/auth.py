@@ -1,13 +1,17 @@
 """OAuth 2.0 helper for Google Slides and Drive APIs."""
 
-import json
+import functools
 import os
+import threading
 from pathlib import Path
 
+import orjson
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest, build_http
 
 # Both scopes needed: Slides for creating/editing, Drive for copying templates
 SCOPES = [
@@ -19,23 +23,38 @@ _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 _CREDENTIALS_PATH = _PROJECT_ROOT / "credentials.json"
 _TOKEN_PATH = _PROJECT_ROOT / "token.json"
 
+# Built services are shared process-wide; building parses the discovery
+# document. Requests never go through the service's own connection: each
+# thread gets its own authorized httplib2.Http per service (httplib2 is not
+# thread-safe). Every web run starts on a fresh worker thread, so only the
+# service objects, not the connections, carry over between web runs.
+_services = {}
+_services_lock = threading.Lock()
+_local = threading.local()
 
+
+@functools.lru_cache(maxsize=2)
 def get_credentials(server_mode: bool = False) -> Credentials:
     """Load cached credentials, refresh if expired, or run OAuth flow.
 
+    Memoized per server_mode, so the token is loaded once per process and
+    shared by the Slides and Drive services (google-auth refreshes it in
+    place when it expires).
+
     Args:
         server_mode: If True, use GOOGLE_TOKEN_JSON env var and never open
                      a browser. Raises RuntimeError if no valid token exists.
 
     Expects credentials.json in the project root (downloaded from Google Cloud Console).
-    Caches the token to token.json for subsequent runs.
+    Caches the token to token.json whenever it is refreshed or newly issued.
     """
     creds = None
+    creds_changed = False
 
     # Cloud deploy: load token from env var or Streamlit secrets
     token_json_env = os.getenv("GOOGLE_TOKEN_JSON")
     if token_json_env:
-        creds = Credentials.from_authorized_user_info(json.loads(token_json_env), SCOPES)
+        creds = Credentials.from_authorized_user_info(orjson.loads(token_json_env), SCOPES)
 
     if not creds:
         try:
@@ -49,10 +68,11 @@ def get_credentials(server_mode: bool = False) -> Credentials:
 
     # Local: load from file
     if not creds and _TOKEN_PATH.exists():
-        creds = Credentials.from_authorized_user_file(str(_TOKEN_PATH), SCOPES)
+        creds = Credentials.from_authorized_user_info(orjson.loads(_TOKEN_PATH.read_bytes()), SCOPES)
 
     if creds and creds.expired and creds.refresh_token:
         creds.refresh(Request())
+        creds_changed = True
     elif not creds or not creds.valid:
         if server_mode:
             raise RuntimeError(
@@ -65,22 +85,54 @@ def get_credentials(server_mode: bool = False) -> Credentials:
                 f"credentials.json not found at {_CREDENTIALS_PATH}\n"
                 "Download it from Google Cloud Console → APIs & Services → Credentials → OAuth 2.0 Client IDs"
             )
-        flow = InstalledAppFlow.from_client_secrets_file(str(_CREDENTIALS_PATH), SCOPES)
+        flow = InstalledAppFlow.from_client_config(
+            orjson.loads(_CREDENTIALS_PATH.read_bytes()), SCOPES)
         creds = flow.run_local_server(port=0)
+        creds_changed = True
 
-    # Save for next run (skip if running from env var or Streamlit secrets)
-    if not token_json_env and not server_mode:
-        with open(_TOKEN_PATH, "w") as f:
-            f.write(creds.to_json())
+    # Save for next run if it changed (skip if running from env var or Streamlit secrets)
+    if creds_changed and not token_json_env and not server_mode:
+        # Write-then-rename so a concurrent reader never sees a partial file
+        tmp_path = _TOKEN_PATH.with_suffix(".json.tmp")
+        tmp_path.write_text(creds.to_json(), encoding="utf-8")
+        os.replace(tmp_path, _TOKEN_PATH)
 
     return creds
 
 
+def _thread_http(key: tuple, server_mode: bool) -> AuthorizedHttp:
+    """Return this thread's authorized connection for one service."""
+    https = _local.__dict__.setdefault("https", {})
+    if key not in https:
+        https[key] = AuthorizedHttp(get_credentials(server_mode), http=build_http())
+    return https[key]
+
+
+def _cached_service(name: str, version: str, server_mode: bool):
+    """Build (or reuse the process's) authorized API resource.
+
+    Discovery documents ship with google-api-python-client (static
+    discovery), so building never fetches or caches them over the network.
+    Each request is bound to the calling thread's connection when it is
+    created, so the resource can be shared across threads.
+    """
+    key = (name, version, server_mode)
+    with _services_lock:
+        if key not in _services:
+            def request_builder(_http, *args, **kwargs):
+                return HttpRequest(_thread_http(key, server_mode), *args, **kwargs)
+
+            _services[key] = build(name, version, credentials=get_credentials(server_mode),
+                                   requestBuilder=request_builder,
+                                   static_discovery=True, cache_discovery=False)
+        return _services[key]
+
+
 def build_slides_service(server_mode: bool = False):
     """Return an authorized Google Slides API v1 resource."""
-    return build("slides", "v1", credentials=get_credentials(server_mode))
+    return _cached_service("slides", "v1", server_mode)
 
 
 def build_drive_service(server_mode: bool = False):
     """Return an authorized Google Drive API v3 resource."""
-    return build("drive", "v3", credentials=get_credentials(server_mode))
+    return _cached_service("drive", "v3", server_mode)
@@ -1,6 +1,7 @@
 """CLI entry point for YouTube Competitor Analysis pipeline."""
 
 import argparse
+import logging
 import sys
 
 from pipeline import run_pipeline
@@ -32,12 +33,28 @@ def parse_args():
         action="store_true",
         help="Skip Google Slides report generation",
     )
+    parser.add_argument(
+        "--no-batch",
+        action="store_true",
+        help="Call Claude directly instead of via the Message Batches API "
+             "(full token price, but no wait of up to 30 minutes)",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Hide per-channel fetch details (Shorts filtered); warnings still show",
+    )
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
 
+    # Fetch details from youtube_api go to stdout alongside the progress
+    # lines; other libraries stay at WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+    logging.getLogger("youtube_api").setLevel(logging.WARNING if args.quiet else logging.INFO)
+
     print(f"\n=== YouTube Competitor Analysis ===")
 
     for event in run_pipeline(
@@ -45,6 +62,7 @@ def main():
         competitors=args.competitors,
         days=args.days,
         skip_slides=args.skip_slides,
+        use_batch=not args.no_batch,
     ):
         if event["type"] == "progress":
             print(event["message"])
@@ -54,7 +72,8 @@ def main():
         elif event["type"] == "result":
             summary = event["summary"]
             print(f"\n=== Summary ===")
-            print(f"Channels fetched: {summary['channels_fetched']}")
+            cached = f" ({summary['cached_channels']} from cache)" if summary["cached_channels"] else ""
+            print(f"Channels fetched: {summary['channels_fetched']}{cached}")
             if summary["failed_channels"]:
                 print(f"Channels failed:  {len(summary['failed_channels'])} ({', '.join(summary['failed_channels'])})")
             print(f"Total videos:     {summary['total_videos']}")
@@ -4,17 +4,29 @@ Extracted from main.py so it can be called by both the CLI and web UI.
 Yields progress/result/error dicts instead of printing directly.
 """
 
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Generator
 
+import orjson
 from dotenv import load_dotenv
 
-from youtube_api import fetch_channel_data
-from analytics import process_all
-from ai_insights import generate_insights
+# youtube_api, analytics, ai_insights and slides_report are imported where
+# they're used, so --help and input validation don't pay for loading
+# googleapiclient and anthropic
+
+
+def _dump_json(obj, path: Path, indent: bool = True) -> None:
+    """Write obj to path as UTF-8 JSON (indented unless indent=False).
+
+    OPT_NON_STR_KEYS keeps parity with json.dump, which stringifies int keys.
+    """
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    path.write_bytes(orjson.dumps(obj, option=option))
 
 
 def deduplicate_handles(channel: str, competitors: list[str]) -> tuple[list[str], list[str]]:
@@ -41,9 +53,13 @@ def run_pipeline(
     skip_slides: bool = False,
     server_mode: bool = False,
     tmp_dir: str | Path | None = None,
+    use_batch: bool = True,
 ) -> Generator[dict, None, None]:
     """Run the full analysis pipeline as a generator.
 
+    AI insights go through the Message Batches API unless use_batch is False
+    or server_mode is set (someone is waiting on the web UI).
+
     Yields dicts with keys:
         {"type": "progress", "message": "..."}
         {"type": "result", "report_url": "...", "summary": {...}}
@@ -82,34 +98,68 @@ def run_pipeline(
     total_videos = 0
     failed_channels = []
 
-    # Fetch channel data
-    yield {"type": "progress", "message": f"Fetching data for {channel}..."}
+    # Fetch all channels concurrently — each fetch is network-bound and builds
+    # its own API client, so the phase takes about as long as the slowest channel
+    yield {"type": "progress", "message": f"Fetching data for {channel} and {len(competitors)} competitors..."}
+    from youtube_api import fetch_channel_data
+    from analytics import assemble_analytics, build_channel_summary
+    executor = ThreadPoolExecutor(max_workers=1 + len(competitors))
     try:
-        channel_data = fetch_channel_data(channel, api_key, days=days)
+        channel_future = executor.submit(fetch_channel_data, channel, api_key, days=days)
+        comp_futures = {
+            executor.submit(fetch_channel_data, comp, api_key, days=days): i
+            for i, comp in enumerate(competitors)
+        }
+
+        try:
+            channel_data = channel_future.result()
+        except Exception as e:
+            yield {"type": "error", "message": f"Error fetching {channel}: {e}\nCannot continue without the primary channel."}
+            return
         channel_data["role"] = "channel"
+        try:
+            channel_summary = build_channel_summary(channel_data, days)
+        except Exception as e:
+            yield {"type": "error", "message": f"Error analyzing {channel}: {e}\nCannot continue without the primary channel."}
+            return
         period_count = len(channel_data["period_videos"])
         baseline_count = len(channel_data["baseline_videos"])
         total_videos += period_count + baseline_count
         yield {"type": "progress", "message": f"  {channel_data['channel_name']}: {period_count} videos in period, {baseline_count} baseline"}
-    except Exception as e:
-        yield {"type": "error", "message": f"Error fetching {channel}: {e}\nCannot continue without the primary channel."}
-        return
 
-    # Fetch competitor data
-    competitors_data = []
-    for comp in competitors:
-        yield {"type": "progress", "message": f"Fetching data for {comp}..."}
-        try:
-            comp_data = fetch_channel_data(comp, api_key, days=days)
+        # Report and summarize competitors as they finish (overlapping the
+        # remaining fetches); keep results in input order
+        fetched = {}
+        summaries = {}
+        failed = set()
+        for future in as_completed(comp_futures):
+            i = comp_futures[future]
+            comp = competitors[i]
+            try:
+                comp_data = future.result()
+            except Exception as e:
+                yield {"type": "progress", "message": f"  Warning: skipping {comp} — {e}"}
+                failed.add(i)
+                continue
             comp_data["role"] = "competitor"
+            try:
+                summaries[i] = build_channel_summary(comp_data, days)
+            except Exception as e:
+                yield {"type": "progress", "message": f"  Warning: skipping {comp} — analytics failed: {e}"}
+                failed.add(i)
+                continue
             period_count = len(comp_data["period_videos"])
             baseline_count = len(comp_data["baseline_videos"])
             total_videos += period_count + baseline_count
             yield {"type": "progress", "message": f"  {comp_data['channel_name']}: {period_count} videos in period, {baseline_count} baseline"}
-            competitors_data.append(comp_data)
-        except Exception as e:
-            yield {"type": "progress", "message": f"  Warning: skipping {comp} — {e}"}
-            failed_channels.append(comp)
+            fetched[i] = comp_data
+    finally:
+        # Don't block on stragglers if we bailed out early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    competitors_data = [fetched[i] for i in sorted(fetched)]
+    competitor_summaries = [summaries[i] for i in sorted(summaries)]
+    failed_channels.extend(competitors[i] for i in sorted(failed))
 
     if len(competitors_data) < 4:
         yield {"type": "error", "message": f"Only {len(competitors_data)} competitors fetched successfully (need 4)"}
@@ -117,7 +167,7 @@ def run_pipeline(
 
     # Build output
     output = {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "generated_at": datetime.now(timezone.utc),  # orjson writes it as ISO 8601
         "days": days,
         "channel": channel_data,
         "competitors": competitors_data,
@@ -131,16 +181,21 @@ def run_pipeline(
     tmp_dir.mkdir(exist_ok=True)
     output_path = tmp_dir / "raw_data.json"
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    # Artifacts are for debugging and standalone re-runs only; stages get the
+    # dicts in memory, so write them on a background thread off the critical path
+    writer = ThreadPoolExecutor(max_workers=1)
+    writes = {}
+
+    # Intermediate, machine-read only — written compact
+    writes[output_path] = writer.submit(_dump_json, output, output_path, indent=False)
 
-    # Run analytics
+    # Run analytics — per-channel summaries were built during the fetch,
+    # so only the cross-channel comparison is left
     yield {"type": "progress", "message": "Running analytics..."}
-    analytics = process_all(output)
+    analytics = assemble_analytics(channel_summary, competitor_summaries)
 
     analytics_path = tmp_dir / "analytics.json"
-    with open(analytics_path, "w", encoding="utf-8") as f:
-        json.dump(analytics, f, indent=2, ensure_ascii=False)
+    writes[analytics_path] = writer.submit(_dump_json, analytics, analytics_path)
 
     # Analytics summary
     top_performer = analytics["comparative"]["top_performer"]
@@ -158,10 +213,12 @@ def run_pipeline(
     if anthropic_key:
         yield {"type": "progress", "message": "Generating AI insights..."}
         try:
-            insights = generate_insights(analytics)
+            from ai_insights import generate_insights
+
+            # Batch API halves token cost but can take minutes — CLI only
+            insights = generate_insights(analytics, use_batch=use_batch and not server_mode)
             insights_path = tmp_dir / "insights.json"
-            with open(insights_path, "w", encoding="utf-8") as f:
-                json.dump(insights, f, indent=2, ensure_ascii=False)
+            writes[insights_path] = writer.submit(_dump_json, insights, insights_path)
             yield {"type": "progress", "message": "  AI insights generated"}
         except Exception as e:
             yield {"type": "progress", "message": f"  Warning: AI insights failed — {e}"}
@@ -187,12 +244,22 @@ def run_pipeline(
     else:
         yield {"type": "progress", "message": "Skipping Google Slides report (skip_slides=True)"}
 
+    # Wait for the artifact writes; a failed write doesn't void the report
+    writer.shutdown(wait=True)
+    for path, future in writes.items():
+        if future.exception():
+            yield {"type": "progress", "message": f"  Warning: could not save {path.name} — {future.exception()}"}
+
     # Summary
     all_channels = 1 + len(competitors_data)
-    quota_estimate = all_channels * 6
+    # ~5 units per fetched channel (one playlist walk, see
+    # youtube_data_pipeline.md); channels served from the fetch cache are free
+    cached_channels = sum(d.get("from_cache", False) for d in [channel_data, *competitors_data])
+    quota_estimate = (all_channels - cached_channels) * 5
 
     summary = {
         "channels_fetched": all_channels,
+        "cached_channels": cached_channels,
         "failed_channels": failed_channels,
         "total_videos": total_videos,
         "quota_estimate": quota_estimate,
@@ -9,12 +9,14 @@ Usage:
     python execution/slides_report.py
 """
 
-import json
+import functools
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 from googleapiclient.errors import HttpError
 
@@ -25,6 +27,14 @@ from slides_template import (
     PAGE_COMPETITOR, PAGE_IDEA,
 )
 
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@functools.cache
+def _ensure_env() -> None:
+    """Load the project .env once per process (existing env vars win)."""
+    load_dotenv(_PROJECT_ROOT / ".env", override=False)
+
 
 # ---------------------------------------------------------------------------
 # Element ID registry — all objectIds on duplicable slides
@@ -63,12 +73,17 @@ def _idea_element_ids() -> list[str]:
     return ids
 
 
-def _build_object_ids_map(page_id: str, element_ids: list[str], suffix: str) -> dict:
+# The registries are fixed — build them once at import. The *_KEYS tuples
+# are everything a duplicateObject remaps: the page, then its elements.
+_COMPETITOR_ELEMENT_IDS = tuple(_competitor_element_ids())
+_IDEA_ELEMENT_IDS = tuple(_idea_element_ids())
+_COMPETITOR_KEYS = (PAGE_COMPETITOR, *_COMPETITOR_ELEMENT_IDS)
+_IDEA_KEYS = (PAGE_IDEA, *_IDEA_ELEMENT_IDS)
+
+
+def _build_object_ids_map(keys: tuple[str, ...], suffix: str) -> dict:
     """Build an objectIds mapping for duplicateObject: old_id -> new_id."""
-    mapping = {page_id: f"{page_id}_{suffix}"}
-    for eid in element_ids:
-        mapping[eid] = f"{eid}_{suffix}"
-    return mapping
+    return {k: f"{k}_{suffix}" for k in keys}
 
 # ---------------------------------------------------------------------------
 # Formatting helpers
@@ -97,10 +112,8 @@ def _fmt_outlier(val) -> str:
 
 def _truncate(text: str, max_len: int = 50) -> str:
     """Truncate text with ellipsis if too long."""
-    if not text:
-        return ""
-    if len(text) <= max_len:
-        return text
+    if not text or len(text) <= max_len:
+        return text or ""
     return text[:max_len - 3] + "..."
 
 
@@ -187,7 +200,16 @@ def _fill_colored_bullets(object_id: str, items: list[str], colors: list[dict],
     if not items:
         items = ["No data available"]
 
-    text = "\n\n".join(f"• {item}" for item in items[:3])
+    # One pass: build each bullet and record where its "•" starts
+    parts = []
+    starts = []
+    pos = 0
+    for item in items[:3]:
+        bullet_text = f"• {item}"
+        parts.append(bullet_text)
+        starts.append(pos)
+        pos += len(bullet_text) + 2  # +2 for "\n\n"
+    text = "\n\n".join(parts)
 
     reqs = [
         {"deleteText": {"objectId": object_id, "textRange": {"type": "ALL"}}},
@@ -209,26 +231,22 @@ def _fill_colored_bullets(object_id: str, items: list[str], colors: list[dict],
     ]
 
     # Color just the bullet marker (•), keep body text white
-    pos = 0
-    for i, item in enumerate(items[:3]):
-        bullet_text = f"• {item}"
-        if i < len(colors):
-            reqs.append({
-                "updateTextStyle": {
-                    "objectId": object_id,
-                    "style": {
-                        "foregroundColor": {"opaqueColor": {"rgbColor": colors[i]}},
-                        "bold": True,
-                    },
-                    "textRange": {
-                        "type": "FIXED_RANGE",
-                        "startIndex": pos,
-                        "endIndex": pos + 1,  # just the "•"
-                    },
-                    "fields": "foregroundColor,bold",
-                }
-            })
-        pos += len(bullet_text) + 2  # +2 for "\n\n"
+    for start, color in zip(starts, colors):
+        reqs.append({
+            "updateTextStyle": {
+                "objectId": object_id,
+                "style": {
+                    "foregroundColor": {"opaqueColor": {"rgbColor": color}},
+                    "bold": True,
+                },
+                "textRange": {
+                    "type": "FIXED_RANGE",
+                    "startIndex": start,
+                    "endIndex": start + 1,  # just the "•"
+                },
+                "fields": "foregroundColor,bold",
+            }
+        })
 
     return reqs
 
@@ -237,14 +255,12 @@ def _fill_colored_bullets(object_id: str, items: list[str], colors: list[dict],
 # Slide fill builders
 # ---------------------------------------------------------------------------
 
-def _fill_title_slide(analytics: dict) -> list[dict]:
-    """Fill the title slide with current month/year, analysis window, and channel name."""
-    now = datetime.now(timezone.utc)
-    date_str = now.strftime("%B %Y")
+def _fill_title_slide(analytics: dict, month_year: str) -> list[dict]:
+    """Fill the title slide with the report month/year, analysis window, and channel name."""
     days = analytics.get("days", 60)
 
     reqs = []
-    reqs += _replace_shape_text("tmpl_title_date", f"{date_str}  |  {days}-Day Analysis Window",
+    reqs += _replace_shape_text("tmpl_title_date", f"{month_year}  |  {days}-Day Analysis Window",
                                 16, LIGHT_GRAY)
 
     # Channel name
@@ -455,6 +471,14 @@ def _fill_takeaways_slide(analytics: dict, insights: dict | None = None) -> list
 # Fallback content generators (when insights=None, Feature 4 not built)
 # ---------------------------------------------------------------------------
 
+def _channel_rank(ranking: list[dict], channel_name: str) -> int | None:
+    """1-based position of channel_name in a comparative ranking, or None."""
+    return next(
+        (i + 1 for i, r in enumerate(ranking) if r["channel_name"] == channel_name),
+        None
+    )
+
+
 def _build_fallback_overview(analytics: dict) -> str:
     """Generate a data-driven overview from analytics rankings."""
     channel = analytics.get("channel", {})
@@ -465,16 +489,8 @@ def _build_fallback_overview(analytics: dict) -> str:
     top_performer = comparative.get("top_performer", "N/A")
     num_competitors = len(competitors)
 
-    views_ranking = comparative.get("views_ranking", [])
-    channel_views_rank = next(
-        (i + 1 for i, r in enumerate(views_ranking) if r["channel_name"] == channel_name),
-        None
-    )
-    eng_ranking = comparative.get("engagement_ranking", [])
-    channel_eng_rank = next(
-        (i + 1 for i, r in enumerate(eng_ranking) if r["channel_name"] == channel_name),
-        None
-    )
+    channel_views_rank = _channel_rank(comparative.get("views_ranking", []), channel_name)
+    channel_eng_rank = _channel_rank(comparative.get("engagement_ranking", []), channel_name)
 
     parts = [
         f"Analysis of {channel_name} against {num_competitors} competitors.",
@@ -624,10 +640,7 @@ def _build_fallback_takeaways(analytics: dict) -> list[str]:
     channel_name = channel.get("channel_name", "Your channel")
 
     views_ranking = comparative.get("views_ranking", [])
-    channel_rank = next(
-        (i + 1 for i, r in enumerate(views_ranking) if r["channel_name"] == channel_name),
-        len(views_ranking)
-    )
+    channel_rank = _channel_rank(views_ranking, channel_name) or len(views_ranking)
     takeaways.append(
         f"{channel_name} ranks #{channel_rank} of {len(views_ranking)} channels in total period views. "
         f"Top performer is {top_performer}."
@@ -653,6 +666,27 @@ def _build_fallback_takeaways(analytics: dict) -> list[str]:
 # Core report generator
 # ---------------------------------------------------------------------------
 
+def _revoke_share(drive_service, report_id: str, share_future) -> None:
+    """Undo the link share after a failed fill, once the share has finished.
+
+    Best effort: the fill error is what the caller needs to see, so a failed
+    share or revoke is only reported.
+    """
+    try:
+        permission = share_future.result()
+    except Exception:
+        return  # never shared
+    try:
+        _retry_api(
+            drive_service.permissions().delete(
+                fileId=report_id,
+                permissionId=permission["id"],
+            ).execute
+        )
+    except Exception as e:
+        print(f"  Warning: could not revoke link sharing on {report_id}: {e}")
+
+
 def generate_report(analytics: dict, insights: dict | None = None, server_mode: bool = False) -> str:
     """Generate a filled Google Slides report from analytics data.
 
@@ -664,8 +698,7 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
     Returns:
         Google Slides URL for the generated report.
     """
-    env_path = Path(__file__).resolve().parent.parent / ".env"
-    load_dotenv(env_path)
+    _ensure_env()
 
     template_id = os.getenv("GOOGLE_SLIDES_TEMPLATE_ID")
     if not template_id:
@@ -678,12 +711,13 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
     drive_service = build_drive_service(server_mode)
 
     # Step 1: Copy template via Drive API
-    now = datetime.now(timezone.utc)
+    # One timestamp for the file title and the title slide
+    month_year = datetime.now(timezone.utc).strftime("%B %Y")
     channel_name = analytics.get("channel", {}).get("channel_name", "")
     if channel_name:
-        report_title = f"{channel_name} YouTube Analytics Report — {now.strftime('%B %Y')}"
+        report_title = f"{channel_name} YouTube Analytics Report — {month_year}"
     else:
-        report_title = f"YouTube Analytics Report — {now.strftime('%B %Y')}"
+        report_title = f"YouTube Analytics Report — {month_year}"
 
     copy_response = _retry_api(
         drive_service.files().copy(
@@ -694,11 +728,13 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
     report_id = copy_response["id"]
     print(f"  Report created: {report_title}")
 
-    # Collect all fill requests
+    # Collect all requests: duplicates first, then fills. Slides applies the
+    # requests in a batchUpdate in order, so fills can target duplicated IDs.
+    dup_requests = []
     fill_requests = []
 
     # Step 2: Fill title slide
-    fill_requests += _fill_title_slide(analytics)
+    fill_requests += _fill_title_slide(analytics, month_year)
 
     # Step 3: Fill channel slide (uses original objectIds, no id_map needed)
     channel_data = analytics.get("channel", {})
@@ -707,21 +743,13 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
     # Step 4: Duplicate competitor slide N times (reverse order)
     competitors = analytics.get("competitors", [])
     competitor_id_maps = []
-    comp_elements = _competitor_element_ids()
 
     for i in range(len(competitors) - 1, -1, -1):
-        id_map = _build_object_ids_map(PAGE_COMPETITOR, comp_elements, f"c{i}")
-        _retry_api(
-            slides_service.presentations().batchUpdate(
-                presentationId=report_id,
-                body={"requests": [
-                    {"duplicateObject": {
-                        "objectId": PAGE_COMPETITOR,
-                        "objectIds": id_map,
-                    }}
-                ]},
-            ).execute
-        )
+        id_map = _build_object_ids_map(_COMPETITOR_KEYS, f"c{i}")
+        dup_requests.append({"duplicateObject": {
+            "objectId": PAGE_COMPETITOR,
+            "objectIds": id_map,
+        }})
         competitor_id_maps.insert(0, (i, id_map))
 
     # Step 5: Fill each competitor slide using mapped IDs
@@ -748,21 +776,13 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
         })
 
     idea_id_maps = []
-    idea_elements = _idea_element_ids()
 
     for i in range(4, -1, -1):  # 5 ideas: indices 4,3,2,1,0
-        id_map = _build_object_ids_map(PAGE_IDEA, idea_elements, f"i{i}")
-        _retry_api(
-            slides_service.presentations().batchUpdate(
-                presentationId=report_id,
-                body={"requests": [
-                    {"duplicateObject": {
-                        "objectId": PAGE_IDEA,
-                        "objectIds": id_map,
-                    }}
-                ]},
-            ).execute
-        )
+        id_map = _build_object_ids_map(_IDEA_KEYS, f"i{i}")
+        dup_requests.append({"duplicateObject": {
+            "objectId": PAGE_IDEA,
+            "objectIds": id_map,
+        }})
         idea_id_maps.insert(0, (i, id_map))
 
     # Step 8: Fill each idea slide
@@ -778,23 +798,35 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
     # Step 11: Delete original idea template slide
     fill_requests.append({"deleteObject": {"objectId": "tmpl_idea"}})
 
-    # Step 12: Execute all fill requests in a single batch
-    if fill_requests:
+    # Make the report viewable by anyone with the link. This only needs the
+    # file ID, so it runs on a worker alongside the batchUpdate. This thread
+    # only uses the Drive service again after the share has finished, so its
+    # connection is never used by both threads at once.
+    sharing = ThreadPoolExecutor(max_workers=1)
+    share_future = sharing.submit(
+        _retry_api,
+        drive_service.permissions().create(
+            fileId=report_id,
+            body={"type": "anyone", "role": "reader"},
+            fields="id",
+        ).execute,
+    )
+    sharing.shutdown(wait=False)
+
+    # Step 12: Execute duplicates and fills in a single batch (one round-trip)
+    try:
         _retry_api(
             slides_service.presentations().batchUpdate(
                 presentationId=report_id,
-                body={"requests": fill_requests},
+                body={"requests": dup_requests + fill_requests},
             ).execute
         )
+    except Exception:
+        # Don't leave an unfilled copy readable by anyone with the link
+        _revoke_share(drive_service, report_id, share_future)
+        raise
 
-    # Make the report viewable by anyone with the link
-    _retry_api(
-        drive_service.permissions().create(
-            fileId=report_id,
-            body={"type": "anyone", "role": "reader"},
-            fields="id",
-        ).execute
-    )
+    share_future.result()
 
     url = f"https://docs.google.com/presentation/d/{report_id}/edit"
     print(f"  Report filled successfully")
@@ -806,23 +838,20 @@ def generate_report(analytics: dict, insights: dict | None = None, server_mode:
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    env_path = Path(__file__).resolve().parent.parent / ".env"
-    load_dotenv(env_path)
+    _ensure_env()
 
-    analytics_path = Path(__file__).resolve().parent.parent / ".tmp" / "analytics.json"
+    analytics_path = _PROJECT_ROOT / ".tmp" / "analytics.json"
     if not analytics_path.exists():
         print(f"Error: {analytics_path} not found. Run the pipeline first.")
         raise SystemExit(1)
 
-    with open(analytics_path, "r", encoding="utf-8") as f:
-        analytics = json.load(f)
+    analytics = orjson.loads(analytics_path.read_bytes())
 
     # Check for optional insights
-    insights_path = Path(__file__).resolve().parent.parent / ".tmp" / "insights.json"
+    insights_path = _PROJECT_ROOT / ".tmp" / "insights.json"
     insights = None
     if insights_path.exists():
-        with open(insights_path, "r", encoding="utf-8") as f:
-            insights = json.load(f)
+        insights = orjson.loads(insights_path.read_bytes())
 
     url = generate_report(analytics, insights)
     print(f"\n  Report URL: {url}")
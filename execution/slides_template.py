@@ -318,41 +318,45 @@ def _build_data_slide(page_id: str, prefix: str, label: str) -> list[dict]:
                       _in(0.5), tph_y, _in(4.0), _in(0.3),
                       "TOP PERFORMING VIDEOS", accent, 11, bold=True, font=FONT_LABEL)
 
-    # 5 video rows
+    # 5 video rows — geometry shared by every row is computed once
     row_h = _in(0.44)
     row_y_start = tph_y + _in(0.4)
     row_gap = _in(0.05)
+    row_x, row_w = _in(0.5), _in(9.0)
+    cell_pad = _in(0.08)
+    cell_h = row_h - _in(0.16)
+    rank_x, rank_w = _in(0.6), _in(0.35)
+    title_x, title_w = _in(1.0), _in(5.5)
+    views_x, views_w = _in(6.7), _in(1.4)
+    eng_x, eng_w = _in(8.2), _in(1.1)
 
     for v in range(1, 6):
         ry = row_y_start + (v - 1) * (row_h + row_gap)
+        cell_y = ry + cell_pad
 
         # Row background (subtle alternating)
         row_fill = CARD_COLOR if v % 2 == 1 else BG_COLOR
         reqs += _rect(f"tmpl_{prefix}_v{v}_bg", page_id,
-                      _in(0.5), ry, _in(9.0), row_h, row_fill)
+                      row_x, ry, row_w, row_h, row_fill)
 
         # Rank
         reqs += _text_box(f"tmpl_{prefix}_v{v}_rank", page_id,
-                          _in(0.6), ry + _in(0.08),
-                          _in(0.35), row_h - _in(0.16),
+                          rank_x, cell_y, rank_w, cell_h,
                           f"{v}.", TERTIARY, 11, bold=True, font=FONT_BODY)
 
         # Title
         reqs += _text_box(f"tmpl_{prefix}_v{v}_title", page_id,
-                          _in(1.0), ry + _in(0.08),
-                          _in(5.5), row_h - _in(0.16),
+                          title_x, cell_y, title_w, cell_h,
                           f"{{{{V{v}_TITLE}}}}", WHITE, 11, font=FONT_BODY)
 
         # Views
         reqs += _text_box(f"tmpl_{prefix}_v{v}_views", page_id,
-                          _in(6.7), ry + _in(0.08),
-                          _in(1.4), row_h - _in(0.16),
+                          views_x, cell_y, views_w, cell_h,
                           f"{{{{V{v}_VIEWS}}}}", GREEN, 11, bold=True, font=FONT_MONO)
 
         # Engagement
         reqs += _text_box(f"tmpl_{prefix}_v{v}_engagement", page_id,
-                          _in(8.2), ry + _in(0.08),
-                          _in(1.1), row_h - _in(0.16),
+                          eng_x, cell_y, eng_w, cell_h,
                           f"{{{{V{v}_ENG}}}}", LIGHT_GRAY, 11, font=FONT_MONO)
 
     return reqs
@@ -592,12 +596,60 @@ def _build_takeaways_slide() -> list[dict]:
     return reqs
 
 
+# ---------------------------------------------------------------------------
+# Request validation
+# ---------------------------------------------------------------------------
+
+def _check_object_ids(requests: list[dict]) -> None:
+    """Check object ID references locally before sending the batch.
+
+    Slides rejects the whole batchUpdate if a single request creates an ID
+    twice or targets an object that doesn't exist yet, and only says so
+    after the round-trip. Every request here either creates an object
+    (createSlide/createShape) or targets one created earlier in the batch.
+
+    Raises:
+        ValueError: naming the first offending request.
+    """
+    created = set()
+    for i, request in enumerate(requests):
+        (kind, body), = request.items()
+        oid = body.get("objectId")
+
+        if kind in ("createSlide", "createShape"):
+            if not 5 <= len(oid) <= 50:
+                raise ValueError(
+                    f"Request {i} ({kind}): objectId {oid!r} must be 5-50 characters"
+                )
+            if oid in created:
+                raise ValueError(f"Request {i} ({kind}): objectId {oid!r} created twice")
+            page_id = body.get("elementProperties", {}).get("pageObjectId")
+            if page_id is not None and page_id not in created:
+                raise ValueError(
+                    f"Request {i} ({kind}): page {page_id!r} not created before {oid!r}"
+                )
+            created.add(oid)
+        elif oid not in created:
+            raise ValueError(f"Request {i} ({kind}): objectId {oid!r} not created earlier")
+
+
 # ---------------------------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------------------------
 
 def create_template() -> str:
     """Create the 6-slide template and return the presentation ID."""
+    requests = [
+        *_build_title_slide(),
+        *_build_channel_slide(),
+        *_build_competitor_slide(),
+        *_build_comparative_slide(),
+        *_build_idea_slide(),
+        *_build_takeaways_slide(),
+    ]
+    # Fail before creating an empty presentation
+    _check_object_ids(requests)
+
     service = build_slides_service()
 
     presentation = service.presentations().create(
@@ -605,15 +657,7 @@ def create_template() -> str:
     ).execute()
     pres_id = presentation["presentationId"]
 
-    requests = []
-    requests += _build_title_slide()
-    requests += _build_channel_slide()
-    requests += _build_competitor_slide()
-    requests += _build_comparative_slide()
-    requests += _build_idea_slide()
-    requests += _build_takeaways_slide()
-
-    # Delete the default blank slide
+    # Delete the default blank slide once the six template slides exist
     default_slide_id = presentation["slides"][0]["objectId"]
     requests.append({"deleteObject": {"objectId": default_slide_id}})
 
@@ -1,74 +1,194 @@
 """YouTube Data API v3 wrapper for channel and video data fetching."""
 
+import functools
+import hashlib
+import logging
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from http.cookiejar import DefaultCookiePolicy
+from itertools import islice
+from pathlib import Path
 
+import orjson
 import requests
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+
+# Concurrent HEAD requests per _find_shorts call. Small on purpose: the
+# pipeline already fetches several channels at once, and these hit
+# youtube.com itself rather than the quota-managed API.
+_SHORTS_CHECK_WORKERS = 4
+
+
+class _TokenBucket:
+    """Thread-safe token bucket: bursts up to `capacity`, refills at `rate`/s."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Process-wide cap on youtube.com HEAD requests, shared by every channel's
+# shorts-check workers (channels are fetched in parallel). 3/s keeps the
+# budget of the old serial loop (one request per 0.3s) for the whole process.
+_HEAD_LIMITER = _TokenBucket(rate=3, capacity=3)
+
+# Wait before the one retry of a throttled or failed HEAD check
+_SHORTS_RETRY_DELAY = 2
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# fetch_channel_data results are reused for this long (seconds) unless
+# YOUTUBE_CACHE_TTL overrides it; 0 or less disables the cache
+_DEFAULT_CACHE_TTL = 3600
+
+_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+# One keep-alive HTTP connection per thread (httplib2.Http is not thread-safe),
+# shared by every API call that thread makes
+_local = threading.local()
+
+
+def _thread_http():
+    """Return this thread's httplib2.Http, creating it on first use."""
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = build_http()
+    return http
+
+
+def _thread_session() -> requests.Session:
+    """Return this thread's keep-alive session for youtube.com HEAD requests.
+
+    Cookies are never stored, so each check sees the same anonymous
+    response a one-off request would.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
 
 
 def _build_service(api_key: str):
-    """Build a YouTube Data API v3 service object."""
-    return build("youtube", "v3", developerKey=api_key)
+    """Build (or reuse this thread's) YouTube Data API v3 service object.
+
+    Building parses the bundled discovery document, so each thread does it
+    once per API key rather than once per call.
+    """
+    services = _local.__dict__.setdefault("services", {})
+    if api_key not in services:
+        services[api_key] = build(
+            "youtube", "v3", developerKey=api_key, http=_thread_http(),
+            static_discovery=True, cache_discovery=False,
+        )
+    return services[api_key]
 
 
 def _parse_iso8601_duration(duration: str) -> int:
     """Parse ISO 8601 duration (e.g., PT12M34S) to total seconds."""
-    match = re.match(
-        r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", duration
-    )
+    match = _DURATION_RE.match(duration)
     if not match:
         return 0
-    hours = int(match.group(1) or 0)
-    minutes = int(match.group(2) or 0)
-    seconds = int(match.group(3) or 0)
-    return hours * 3600 + minutes * 60 + seconds
+    hours, minutes, seconds = match.groups(default="0")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
 
 
-def _is_short(video_id: str) -> bool:
+def _is_short(video_id: str) -> bool | None:
     """Check if a video is a YouTube Short via HEAD request.
 
     Returns True if youtube.com/shorts/{id} responds 200 (is a Short),
-    False if it responds 303 (redirects to regular watch page).
+    False if it responds 303 (redirects to regular watch page). A 429, 5xx
+    or network error is retried once after a short wait; if that fails too
+    the answer is unknown and None is returned.
     """
     url = f"https://www.youtube.com/shorts/{video_id}"
-    try:
-        resp = requests.head(url, allow_redirects=False, timeout=10)
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
+    for attempt in range(2):
+        if attempt:
+            time.sleep(_SHORTS_RETRY_DELAY)
+        _HEAD_LIMITER.acquire()
+        try:
+            resp = _thread_session().head(url, allow_redirects=False, timeout=10)
+        except requests.RequestException:
+            continue
+        if resp.status_code != 429 and resp.status_code < 500:
+            return resp.status_code == 200
+    return None
 
 
-def _filter_shorts(videos: list[dict]) -> list[dict]:
-    """Remove YouTube Shorts from a list of videos.
+def _find_shorts(videos: list[dict]) -> set[str]:
+    """Return the IDs of the videos to leave out as YouTube Shorts.
 
-    Two-step filter:
+    Three-step check:
     1. Videos > 180s are definitely long-form (Shorts max is 3 min)
-    2. Videos <= 180s get a HEAD request to youtube.com/shorts/{id}
+    2. Videos <= 180s tagged #shorts in the title are taken as Shorts
+    3. The rest get a HEAD request to youtube.com/shorts/{id}, a few at a time
+
+    Videos whose HEAD check stays inconclusive (throttled or failing) are
+    left out as well: counting a Short as long-form would skew the medians
+    and outlier scores more than dropping a few short videos does.
     """
-    long_form = []
-    to_check = []
+    short_form = [v for v in videos if v["duration_seconds"] <= 180]
+    if not short_form:
+        return set()
 
-    for v in videos:
-        if v["duration_seconds"] > 180:
-            long_form.append(v)
-        else:
-            to_check.append(v)
+    shorts = {v["video_id"] for v in short_form if "#shorts" in v["title"].lower()}
+    to_check = [v["video_id"] for v in short_form if v["video_id"] not in shorts]
 
     if to_check:
-        checked_count = len(to_check)
-        shorts_count = 0
-        for v in to_check:
-            if _is_short(v["video_id"]):
-                shorts_count += 1
-            else:
-                long_form.append(v)
-            time.sleep(0.3)
-        if shorts_count:
-            print(f"    Filtered {shorts_count} Shorts (checked {checked_count} videos <= 3min)")
+        workers = min(_SHORTS_CHECK_WORKERS, len(to_check))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields results in input order
+            is_short = list(pool.map(_is_short, to_check))
+        unknown = [vid for vid, short in zip(to_check, is_short) if short is None]
+        shorts.update(vid for vid, short in zip(to_check, is_short) if short)
+        if unknown:
+            logger.warning("    Could not check %d videos <= 3min for Shorts; leaving them out",
+                           len(unknown))
+            shorts.update(unknown)
+
+    if shorts:
+        logger.info("    Filtered %d Shorts (checked %d videos <= 3min)", len(shorts), len(short_form))
+    return shorts
+
+
+def _filter_shorts(videos: list[dict], shorts: set[str] | None = None) -> list[dict]:
+    """Remove YouTube Shorts from a list of videos.
 
+    Long-form videos (> 180s) come first, then the shorter videos that aren't
+    Shorts, each group in its original order. Pass `shorts` from
+    _find_shorts to reuse checks already made for an overlapping list.
+    """
+    if shorts is None:
+        shorts = _find_shorts(videos)
+    long_form = [v for v in videos if v["duration_seconds"] > 180]
+    long_form += [
+        v for v in videos
+        if v["duration_seconds"] <= 180 and v["video_id"] not in shorts
+    ]
     return long_form
 
 
@@ -92,6 +212,8 @@ def resolve_handle(handle: str, api_key: str) -> dict:
     response = service.channels().list(
         part="id,snippet,statistics,contentDetails",
         forHandle=handle,
+        fields="items(id,snippet/title,statistics(subscriberCount,viewCount),"
+               "contentDetails/relatedPlaylists/uploads)",
     ).execute()
 
     items = response.get("items", [])
@@ -121,6 +243,61 @@ def resolve_handle(handle: str, api_key: str) -> dict:
     }
 
 
+def _iter_uploads(uploads_playlist_id: str, api_key: str):
+    """Yield (video_id, published_at) from an uploads playlist, newest first.
+
+    Pages are fetched lazily, so stopping early saves the remaining
+    playlistItems.list calls. published_at may be None.
+    """
+    service = _build_service(api_key)
+    next_page_token = None
+
+    while True:
+        response = service.playlistItems().list(
+            part="contentDetails",
+            playlistId=uploads_playlist_id,
+            maxResults=50,
+            pageToken=next_page_token,
+            fields="items/contentDetails(videoId,videoPublishedAt),nextPageToken",
+        ).execute()
+
+        for item in response.get("items", []):
+            details = item["contentDetails"]
+            yield details["videoId"], details.get("videoPublishedAt")
+
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            return
+
+
+def _recent_uploads(
+    uploads_playlist_id: str, api_key: str, max_videos: int
+) -> list[tuple[str, str | None]]:
+    """Return the latest max_videos (video_id, published_at) pairs."""
+    return list(islice(_iter_uploads(uploads_playlist_id, api_key), max_videos))
+
+
+def _cutoff_timestamp(days: int) -> str:
+    """Return the start of the analysis window in the API's timestamp format."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _published_before(published: str | None, cutoff: str) -> bool:
+    """True if a playlist timestamp is known and older than cutoff.
+
+    API timestamps are fixed-width UTC ("YYYY-MM-DDTHH:MM:SSZ"), so they
+    order the same as strings and need no parsing. Any other shape is
+    normalized first.
+    """
+    if not published:
+        return False
+    if len(published) != 20 or published[19] != "Z":
+        parsed = datetime.fromisoformat(published.replace("Z", "+00:00"))
+        published = parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return published < cutoff
+
+
 def get_recent_videos(
     uploads_playlist_id: str,
     api_key: str,
@@ -138,37 +315,20 @@ def get_recent_videos(
     Returns:
         List of video IDs
     """
-    service = _build_service(api_key)
     video_ids = []
-    next_page_token = None
     cutoff = None
 
     if days is not None:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-
-    while True:
-        response = service.playlistItems().list(
-            part="contentDetails",
-            playlistId=uploads_playlist_id,
-            maxResults=50,
-            pageToken=next_page_token,
-        ).execute()
-
-        for item in response.get("items", []):
-            published = item["contentDetails"].get("videoPublishedAt")
-            if published and cutoff:
-                pub_dt = datetime.fromisoformat(published.replace("Z", "+00:00"))
-                if pub_dt < cutoff:
-                    # Videos are in reverse chronological order; stop here
-                    return video_ids
+        cutoff = _cutoff_timestamp(days)
 
-            video_ids.append(item["contentDetails"]["videoId"])
+    for video_id, published in _iter_uploads(uploads_playlist_id, api_key):
+        if cutoff and _published_before(published, cutoff):
+            # Videos are in reverse chronological order; stop here
+            break
 
-            if max_videos and len(video_ids) >= max_videos:
-                return video_ids
+        video_ids.append(video_id)
 
-        next_page_token = response.get("nextPageToken")
-        if not next_page_token:
+        if max_videos and len(video_ids) >= max_videos:
             break
 
     return video_ids
@@ -197,6 +357,8 @@ def get_video_details(video_ids: list[str], api_key: str) -> list[dict]:
         response = service.videos().list(
             part="snippet,statistics,contentDetails",
             id=",".join(batch),
+            fields="items(id,snippet(title,publishedAt),"
+                   "statistics(viewCount,likeCount,commentCount),contentDetails/duration)",
         ).execute()
 
         for item in response.get("items", []):
@@ -216,10 +378,68 @@ def get_video_details(video_ids: list[str], api_key: str) -> list[dict]:
     return results
 
 
+def _cache_path(handle: str, days: int) -> Path:
+    """Cache file for one (handle, days) pair. Handles are case-insensitive."""
+    cache_dir = Path(os.getenv("YOUTUBE_CACHE_DIR") or _PROJECT_ROOT / ".tmp" / "youtube_cache")
+    key = hashlib.sha1(f"{handle.lstrip('@').lower()}|{days}".encode()).hexdigest()
+    return cache_dir / f"{key}.json"
+
+
+@functools.lru_cache(maxsize=1)
+def _cache_ttl() -> int:
+    """YOUTUBE_CACHE_TTL in seconds, read once. Negative values mean off."""
+    raw = os.getenv("YOUTUBE_CACHE_TTL")
+    if raw is None:
+        return _DEFAULT_CACHE_TTL
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        logger.warning("Ignoring YOUTUBE_CACHE_TTL=%r (not a whole number of seconds); "
+                       "using %ds", raw, _DEFAULT_CACHE_TTL)
+        return _DEFAULT_CACHE_TTL
+
+
 def fetch_channel_data(handle: str, api_key: str, days: int = 60) -> dict:
+    """Fetch complete channel data, reusing a recent result from disk.
+
+    A rerun for the same handle and window within YOUTUBE_CACHE_TTL seconds
+    (default 1 hour) is served from YOUTUBE_CACHE_DIR (default
+    .tmp/youtube_cache/) without any API calls. Set YOUTUBE_CACHE_TTL=0 to
+    always fetch.
+
+    The result's "from_cache" key says which happened, so callers can tell
+    a free rerun from one that spent quota.
+    """
+    ttl = _cache_ttl()
+    if ttl <= 0:
+        data = _fetch_channel_data(handle, api_key, days)
+        data["from_cache"] = False
+        return data
+
+    path = _cache_path(handle, days)
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            data = orjson.loads(path.read_bytes())
+            data["from_cache"] = True
+            return data
+    except (OSError, orjson.JSONDecodeError):
+        pass  # missing or unreadable — fetch fresh
+
+    data = _fetch_channel_data(handle, api_key, days)
+
+    # Write-then-rename so a concurrent reader never sees a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(data))
+    os.replace(tmp_path, path)
+    data["from_cache"] = False
+    return data
+
+
+def _fetch_channel_data(handle: str, api_key: str, days: int) -> dict:
     """Fetch complete channel data for analysis.
 
-    Orchestrates resolve_handle, get_recent_videos, and get_video_details
+    Orchestrates resolve_handle, the uploads playlist, and get_video_details
     to produce a full data structure for one channel.
 
     Args:
@@ -232,63 +452,92 @@ def fetch_channel_data(handle: str, api_key: str, days: int = 60) -> dict:
         uploads_playlist_id, period_videos, baseline_videos
     """
     channel_info = _retry(resolve_handle, handle, api_key)
-
-    # Period videos: within the analysis window
-    period_ids = _retry(
-        get_recent_videos,
-        channel_info["uploads_playlist_id"],
-        api_key,
-        days=days,
-    )
-    period_videos = _retry(get_video_details, period_ids, api_key) if period_ids else []
-    period_videos = _filter_shorts(period_videos)
-
-    # Baseline videos: most recent 50 long-form (for outlier calculation in Feature 2)
-    # Fetch extra to compensate for shorts that get filtered out
-    baseline_ids = _retry(
-        get_recent_videos,
-        channel_info["uploads_playlist_id"],
-        api_key,
-        max_videos=100,
-    )
-    baseline_videos = (
-        _retry(get_video_details, baseline_ids, api_key) if baseline_ids else []
+    playlist_id = channel_info["uploads_playlist_id"]
+
+    # Baseline: most recent 100 uploads, cut to 50 long-form after Shorts are
+    # filtered (for outlier calculation in Feature 2)
+    uploads = _retry(_recent_uploads, playlist_id, api_key, 100)
+    baseline_ids = [video_id for video_id, _ in uploads]
+
+    # Period: the uploads inside the analysis window. The playlist is newest
+    # first, so that's a prefix of the baseline unless all 100 are in the
+    # window — then the window may hold more, and gets its own walk.
+    cutoff = _cutoff_timestamp(days)
+    period_ids = []
+    for video_id, published in uploads:
+        if _published_before(published, cutoff):
+            break
+        period_ids.append(video_id)
+    if len(period_ids) == 100:
+        period_ids = _retry(get_recent_videos, playlist_id, api_key, days=days)
+
+    # One details fetch and one Shorts check for both lists
+    all_ids = list(dict.fromkeys(baseline_ids + period_ids))
+    details = _retry(get_video_details, all_ids, api_key) if all_ids else []
+    by_id = {v["video_id"]: v for v in details}
+    shorts = _find_shorts(details)
+
+    period_videos = _filter_shorts(
+        [by_id[i] for i in period_ids if i in by_id], shorts
     )
-    baseline_videos = _filter_shorts(baseline_videos)[:50]
+    baseline_videos = _filter_shorts(
+        [by_id[i] for i in baseline_ids if i in by_id], shorts
+    )[:50]
 
     return {
         "channel_id": channel_info["channel_id"],
         "channel_name": channel_info["title"],
         "subscriber_count": channel_info["subscriber_count"],
         "total_views": channel_info["total_views"],
-        "uploads_playlist_id": channel_info["uploads_playlist_id"],
+        "uploads_playlist_id": playlist_id,
         "period_videos": period_videos,
         "baseline_videos": baseline_videos,
     }
 
 
+# 403 reasons that mean "slow down", not "not allowed"
+_RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+# Retries for rate-limited calls (429 or a rate-limit 403); the wait doubles
+# each time, since parallel channel fetches can burst past the limit together
+_RATE_LIMIT_RETRIES = 3
+
+
 def _retry(func, *args, max_retries: int = 1, delay: float = 2.0, **kwargs):
-    """Retry a function once on network/API errors.
+    """Retry a function once on transient network/API errors.
 
-    Quota errors (403) are raised immediately without retry.
+    Quota errors (403 quotaExceeded) are raised immediately as RuntimeError.
+    Rate limits (429, 403 rateLimitExceeded/userRateLimitExceeded) get up to
+    _RATE_LIMIT_RETRIES retries with exponential backoff. Other client
+    errors (400/401/404, 403 forbidden...) and ValueError (e.g. handle not
+    found) can't succeed on a second try, so they are raised without waiting.
     """
-    for attempt in range(max_retries + 1):
+    attempt = 0
+    while True:
         try:
             return func(*args, **kwargs)
         except HttpError as e:
-            if e.resp.status == 403 and "quotaExceeded" in str(e):
+            status = e.resp.status
+            if status == 403 and "quotaExceeded" in str(e):
                 raise RuntimeError(
                     "YouTube API quota exceeded. Quota resets at midnight Pacific Time. "
                     "Check your usage at https://console.cloud.google.com/apis/dashboard"
                 ) from e
-            if attempt < max_retries:
-                print(f"  API error (attempt {attempt + 1}), retrying in {delay}s...")
-                time.sleep(delay)
-            else:
+            rate_limited = status == 429 or (
+                status == 403 and any(reason in str(e) for reason in _RATE_LIMIT_REASONS)
+            )
+            if 400 <= status < 500 and not rate_limited:
+                raise
+            if attempt >= (_RATE_LIMIT_RETRIES if rate_limited else max_retries):
                 raise
+            wait = delay * 2 ** attempt if rate_limited else delay
+            logger.warning("  API error %s (attempt %d), retrying in %ss...", status, attempt + 1, wait)
+            time.sleep(wait)
+        except ValueError:
+            raise
         except Exception:
-            if attempt < max_retries:
-                print(f"  Error (attempt {attempt + 1}), retrying in {delay}s...")
-                time.sleep(delay)
-            else:
+            if attempt >= max_retries:
                 raise
+            logger.warning("  Error (attempt %d), retrying in %ss...", attempt + 1, delay)
+            time.sleep(delay)
+        attempt += 1